@@ -3,40 +3,69 @@ import subprocess
 import threading
 import time
 import os
+import shutil
+import signal
 import sqlite3
-import pandas as pd
-import json
+import orjson
+import io
+import atexit
 from datetime import datetime
 import uuid
+import hashlib
 import logging
-import queue
+from collections import deque
 import re
+import itertools
 from contextlib import contextmanager
 
+try:
+    import fcntl  # POSIX only; used to enlarge the FFmpeg stderr pipe
+except ImportError:
+    fcntl = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DB_PATH = 'streaming_app.db'
+AUTO_REFRESH_SECONDS = 5  # Live statistics/log refresh interval
+MAX_SESSION_LOGS = 1000  # Log entries kept in session state
+MAX_STORED_LOGS = 10000  # Log rows kept in the database across restarts
+RECENT_STREAMS_LIMIT = 100  # History rows shown in the Analytics "Recent Streams" table
+LOG_BATCH_SIZE = 20  # FFmpeg log lines buffered before a flush
+LOG_BATCH_INTERVAL = 0.5  # Seconds before buffered FFmpeg log lines are flushed
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes copied per write when saving uploads
+
 # Database connection pool and thread safety
-@contextmanager
-def get_db_connection():
-    """Thread-safe database connection with proper error handling"""
-    conn = None
-    try:
-        conn = sqlite3.connect('streaming_app.db', timeout=30.0, check_same_thread=False)
+@st.cache_resource
+def _get_pooled_connection(readonly=False):
+    """Open one long-lived connection per mode, shared across reruns and sessions"""
+    if readonly:
+        # Separate read-only connection so readers don't serialize against writers
+        conn = sqlite3.connect(f'file:{DB_PATH}?mode=ro', uri=True, timeout=30.0,
+                               check_same_thread=False, isolation_level=None)
+    else:
+        conn = sqlite3.connect(DB_PATH, timeout=30.0, check_same_thread=False, isolation_level=None)
         conn.execute('PRAGMA journal_mode=WAL')  # Enable WAL mode for better concurrency
         conn.execute('PRAGMA synchronous=NORMAL')  # Balance between safety and performance
-        conn.execute('PRAGMA temp_store=memory')  # Use memory for temporary storage
-        conn.execute('PRAGMA cache_size=10000')  # Increase cache size
-        yield conn
-    except Exception as e:
-        logger.error(f"Database connection error: {e}")
-        if conn:
-            conn.rollback()
-        raise
-    finally:
-        if conn:
-            conn.close()
+    conn.execute('PRAGMA temp_store=MEMORY')  # Use memory for temporary storage
+    conn.execute('PRAGMA cache_size=-20000')  # ~20MB page cache, kept hot across reruns
+    conn.execute('PRAGMA mmap_size=268435456')  # Memory-map up to 256MB of the file for reads
+    atexit.register(conn.close)  # Checkpoint and release the file cleanly on shutdown
+    return conn, threading.RLock()
+
+@contextmanager
+def get_db_connection(readonly=False):
+    """Thread-safe access to the pooled database connection with proper error handling"""
+    conn, lock = _get_pooled_connection(readonly)
+    with lock:
+        try:
+            yield conn
+        except Exception as e:
+            logger.error(f"Database connection error: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            raise
 
 # Database setup
 def init_database():
@@ -73,10 +102,16 @@ def init_database():
                     duration INTEGER,
                     status TEXT NOT NULL DEFAULT 'STARTING',
                     error_message TEXT,
+                    stream_key_hash TEXT,
                     created_at TEXT DEFAULT (datetime('now'))
                 )
             ''')
             
+            # Upgrade databases created before stream_key_hash existed
+            cursor.execute('PRAGMA table_info(stream_history)')
+            if 'stream_key_hash' not in {row[1] for row in cursor.fetchall()}:
+                cursor.execute('ALTER TABLE stream_history ADD COLUMN stream_key_hash TEXT')
+            
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS app_settings (
                     key TEXT PRIMARY KEY,
@@ -99,6 +134,17 @@ def init_database():
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_stream_history_session ON stream_history(session_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_stream_logs_session ON stream_logs(session_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_stream_logs_timestamp ON stream_logs(timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_start ON stream_history(start_time DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_status ON stream_history(status)')  # Covers the status GROUP BY
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_configs_created ON stream_configs(created_at DESC)')
+            
+            # Log retention: keep only the newest rows so the table and its indexes stay small
+            cursor.execute('''
+                DELETE FROM stream_logs WHERE id <= (
+                    SELECT id FROM stream_logs ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+            ''', (MAX_STORED_LOGS,))
+            cursor.execute('PRAGMA optimize')
             
             conn.commit()
             logger.info("Database initialized successfully")
@@ -107,8 +153,13 @@ def init_database():
         logger.error(f"Failed to initialize database: {e}")
         raise
 
+@st.cache_resource
+def ensure_database():
+    """Run schema setup once per server process rather than on every rerun"""
+    init_database()
+
 # Initialize database
-init_database()
+ensure_database()
 
 # Global variables
 if 'streaming_process' not in st.session_state:
@@ -119,34 +170,84 @@ if 'stream_stats' not in st.session_state:
     st.session_state.stream_stats = {}
 if 'current_session_id' not in st.session_state:
     st.session_state.current_session_id = str(uuid.uuid4())
-if 'log_queue' not in st.session_state:
-    st.session_state.log_queue = queue.Queue()
 if 'stream_logs' not in st.session_state:
-    st.session_state.stream_logs = []
+    st.session_state.stream_logs = deque(maxlen=MAX_SESSION_LOGS)
+if 'ffmpeg_debug_logs' not in st.session_state:
+    st.session_state.ffmpeg_debug_logs = False
+if 'video_encoder' not in st.session_state:
+    st.session_state.video_encoder = "libx264"  # Hardware encoding is opt-in from Settings
+if 'saved_upload_ids' not in st.session_state:
+    st.session_state.saved_upload_ids = set()
 
-def log_message(level, message, session_id=None):
-    """Add log message to queue and database with proper error handling"""
-    try:
-        # Ensure we have a valid session_id
-        if not session_id:
-            session_id = st.session_state.get('current_session_id', 'system')
-        
-        # Ensure session_id is not None or empty
-        if not session_id or session_id.strip() == '':
-            session_id = 'system'
-        
-        timestamp = datetime.now().isoformat()
-        log_entry = {
-            'timestamp': datetime.now(),
+_display_time_cache = (None, '')  # ((hour, minute, second), 'HH:MM:SS') of the last formatted log time
+
+def format_display_time(now):
+    """Format a datetime as HH:MM:SS, calling strftime at most once per wall-clock second"""
+    global _display_time_cache
+    key = (now.hour, now.minute, now.second)
+    cached_key, display_time = _display_time_cache  # One tuple read, safe against the monitor thread
+    if cached_key != key:
+        display_time = now.strftime('%H:%M:%S')
+        _display_time_cache = (key, display_time)
+    return display_time
+
+STREAM_LOG_INSERT_SQL = '''
+    INSERT INTO stream_logs (session_id, level, message, timestamp)
+    VALUES (?, ?, ?, ?)
+'''
+
+def add_session_logs(messages, session_id=None, session_logs=None):
+    """Append (level, message) pairs to the session logs; returns the matching stream_logs rows
+
+    The FFmpeg monitor thread has no script run context, so it passes the session's deque in as
+    session_logs instead of reaching for st.session_state.
+    """
+    # Ensure we have a valid session_id
+    if not session_id:
+        session_id = st.session_state.get('current_session_id', 'system')
+    
+    # Ensure session_id is not None or empty
+    if not session_id or session_id.strip() == '':
+        session_id = 'system'
+    
+    # One clock read and one display format per batch, shared by every entry in it
+    now = datetime.now()
+    timestamp = now.isoformat()
+    display_time = format_display_time(now)
+    log_entries = [
+        {
+            'timestamp': now,
+            'display_time': display_time,
             'level': level,
             'message': message,
             'session_id': session_id
         }
-        
-        # Add to session state (limit to last 1000 entries)
-        st.session_state.stream_logs.append(log_entry)
-        if len(st.session_state.stream_logs) > 1000:
-            st.session_state.stream_logs = st.session_state.stream_logs[-1000:]
+        for level, message in messages
+    ]
+    
+    # Add to session state (deque keeps only the last MAX_SESSION_LOGS entries); a failure
+    # here must not cost the database rows
+    try:
+        if session_logs is None:
+            session_logs = st.session_state.stream_logs
+        session_logs.extend(log_entries)
+    except Exception as e:
+        logger.warning(f"Could not add logs to the session: {e}")
+    
+    return [(session_id, level, message, timestamp) for level, message in messages]
+
+def log_message(level, message, session_id=None):
+    """Add log message to the session logs and database with proper error handling"""
+    log_messages([(level, message)], session_id)
+
+def log_messages(messages, session_id=None, session_logs=None):
+    """Add a batch of (level, message) pairs to the session logs and database in one write"""
+    if not messages:
+        return
+    
+    try:
+        rows = add_session_logs(messages, session_id, session_logs)
+        timestamp = rows[0][3]
         
         # Add to database with retry mechanism
         max_retries = 3
@@ -154,10 +255,9 @@ def log_message(level, message, session_id=None):
             try:
                 with get_db_connection() as conn:
                     cursor = conn.cursor()
-                    cursor.execute('''
-                        INSERT INTO stream_logs (session_id, level, message, timestamp)
-                        VALUES (?, ?, ?, ?)
-                    ''', (session_id, level, message, timestamp))
+                    # Autocommit connection: without an explicit transaction every row would commit on its own
+                    cursor.execute('BEGIN IMMEDIATE')
+                    cursor.executemany(STREAM_LOG_INSERT_SQL, rows)
                     conn.commit()
                 break  # Success, exit retry loop
                 
@@ -165,7 +265,8 @@ def log_message(level, message, session_id=None):
                 logger.error(f"Database integrity error (attempt {attempt + 1}): {e}")
                 if attempt == max_retries - 1:
                     # Last attempt failed, log to console only
-                    print(f"[{timestamp}] {level}: {message}")
+                    for level, message in messages:
+                        print(f"[{timestamp}] {level}: {message}")
                 else:
                     time.sleep(0.1)  # Brief delay before retry
                     
@@ -173,7 +274,8 @@ def log_message(level, message, session_id=None):
                 if "database is locked" in str(e).lower():
                     logger.warning(f"Database locked (attempt {attempt + 1}), retrying...")
                     if attempt == max_retries - 1:
-                        print(f"[{timestamp}] {level}: {message}")
+                        for level, message in messages:
+                            print(f"[{timestamp}] {level}: {message}")
                     else:
                         time.sleep(0.2)  # Wait longer for lock to release
                 else:
@@ -186,29 +288,132 @@ def log_message(level, message, session_id=None):
                 
     except Exception as e:
         # Fallback: log to console if all else fails
-        print(f"[{datetime.now().isoformat()}] {level}: {message}")
+        for level, message in messages:
+            print(f"[{datetime.now().isoformat()}] {level}: {message}")
         print(f"Log error: {e}")
 
+@st.cache_resource
+def get_ffmpeg_path():
+    """Resolve the FFmpeg binary once per process; None if it is not on PATH"""
+    return shutil.which('ffmpeg')
+
+@st.cache_data(ttl=3600)
+def get_ffmpeg_version():
+    """Probe FFmpeg once per hour; returns (available, version line)"""
+    ffmpeg_path = get_ffmpeg_path()
+    if ffmpeg_path is None:
+        return False, ""  # Not on PATH, skip the fork/exec entirely
+    try:
+        result = subprocess.run((ffmpeg_path, '-version'), stdin=subprocess.DEVNULL,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              text=True, timeout=5)
+        if result.returncode == 0:
+            return True, result.stdout.partition('\n')[0]
+        return False, ""
+    except:
+        return False, ""
+
+@st.cache_data(ttl=30)
+def get_disk_space(path):
+    """Free and total disk space in GB; cached since statvfs can be slow on network mounts"""
+    total, used, free = shutil.disk_usage(path)  # Portable, unlike os.statvfs
+    return free / 2**30, total / 2**30
+
 def check_ffmpeg():
     """Check if FFmpeg is available"""
+    return get_ffmpeg_version()[0]
+
+# Hardware H.264 encoders in order of preference; libx264 is the CPU fallback
+HARDWARE_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_videotoolbox')
+VIDEO_ENCODERS = ("libx264", "Auto", *HARDWARE_ENCODERS)
+
+@st.cache_resource
+def get_hardware_encoders():
+    """Hardware H.264 encoders that actually work on this machine; probed once per process"""
+    ffmpeg_path = get_ffmpeg_path()
+    if ffmpeg_path is None:
+        return ()
     try:
-        result = subprocess.run(['ffmpeg', '-version'], 
-                              capture_output=True, text=True, timeout=10)
-        return result.returncode == 0
-    except:
-        return False
+        listing = subprocess.run((ffmpeg_path, '-hide_banner', '-encoders'), stdin=subprocess.DEVNULL,
+                                 stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return ()
+    
+    working = []
+    for encoder in HARDWARE_ENCODERS:
+        if encoder.encode() not in listing:
+            continue
+        # Being compiled in doesn't mean the device exists, so encode a few test frames
+        try:
+            probe = subprocess.run(
+                (ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-f', 'lavfi',
+                 '-i', 'color=size=256x256:duration=0.2', '-c:v', encoder, '-f', 'null', '-'),
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15
+            )
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if probe.returncode == 0:
+            working.append(encoder)
+    return tuple(working)
+
+def resolve_video_encoder(choice):
+    """Map the encoder setting to an FFmpeg encoder; "Auto" prefers working hardware over libx264"""
+    if choice == "Auto":
+        hardware = get_hardware_encoders()
+        return hardware[0] if hardware else 'libx264'
+    return choice
+
+@st.cache_data(max_entries=128)
+def _probe_video(video_path, mtime):
+    """Run FFprobe once per file version; mtime invalidates the cache when the file changes"""
+    cmd = [
+        'ffprobe', '-v', 'quiet', '-print_format', 'json',
+        '-show_format', '-show_streams', video_path
+    ]
+    result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, timeout=30)
+    if result.returncode == 0:
+        return orjson.loads(result.stdout)  # Parses the raw bytes, no text decode step
+    return None
+
+# YouTube wants a keyframe at least every 2 seconds; copied video keeps the source's spacing
+MAX_COPY_KEYFRAME_INTERVAL = 2.0
+KEYFRAME_PROBE_SECONDS = 10
 
-def get_video_info(video_path):
-    """Get video information using FFprobe"""
+@st.cache_data(max_entries=128)
+def _probe_keyframe_interval(video_path, mtime):
+    """Largest gap in seconds between keyframes in the first few seconds; None if unknown"""
+    cmd = [
+        'ffprobe', '-v', 'quiet', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+        '-read_intervals', f'%+{KEYFRAME_PROBE_SECONDS}',
+        '-show_entries', 'frame=best_effort_timestamp_time', '-of', 'csv=p=0', video_path
+    ]
+    result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, timeout=30)
+    if result.returncode != 0:
+        return None
+    times = []
+    for line in result.stdout.split():
+        try:
+            times.append(float(line.strip(b',')))
+        except ValueError:
+            continue
+    if len(times) < 2:
+        return None  # A single keyframe says nothing about the spacing
+    return max(later - earlier for earlier, later in zip(times, times[1:]))
+
+def get_keyframe_interval(video_path):
+    """Keyframe spacing of a video file in seconds, or None if it could not be measured"""
     try:
-        cmd = [
-            'ffprobe', '-v', 'quiet', '-print_format', 'json',
-            '-show_format', '-show_streams', video_path
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
-            return json.loads(result.stdout)
+        return _probe_keyframe_interval(video_path, os.path.getmtime(video_path))
+    except Exception as e:
+        log_message('WARNING', f"Failed to probe keyframe spacing: {e}")
         return None
+
+def get_video_info(video_path, mtime=None):
+    """Get video information using FFprobe; pass a known mtime to skip the stat"""
+    try:
+        if mtime is None:
+            mtime = os.path.getmtime(video_path)
+        return _probe_video(video_path, mtime)
     except Exception as e:
         log_message('ERROR', f"Failed to get video info: {e}")
         return None
@@ -232,63 +437,140 @@ def validate_stream_key(stream_key):
     
     return True, "Stream key format appears valid"
 
-def build_optimized_ffmpeg_command(video_file, stream_key, resolution, bitrate, audio_bitrate, encoding_preset, shorts_mode):
+def hash_stream_key(stream_key):
+    """Stable short fingerprint of a stream key (unlike hash(), not salted per process)
+
+    Hashes the key exactly as it goes into the RTMP URL, so equal fingerprints mean equal targets.
+    """
+    return hashlib.blake2b(stream_key.encode(), digest_size=4).hexdigest()
+
+def get_stream_copy_plan(video_file, video_info, resolution, bitrate):
+    """Decide whether the source video/audio can be sent as-is instead of re-encoded"""
+    if not video_info:
+        return False, False
+    
+    streams = video_info.get('streams', [])
+    video = next((stream for stream in streams if stream.get('codec_type') == 'video'), None)
+    audio = next((stream for stream in streams if stream.get('codec_type') == 'audio'), None)
+    
+    # Source must already be streamable H.264 at the target size and within the max bitrate
+    copy_video = video is not None and video.get('codec_name') == 'h264' and video.get('pix_fmt') == 'yuv420p'
+    if copy_video and resolution != "Original":
+        width, height = resolution.split('x')
+        copy_video = (str(video.get('width')), str(video.get('height'))) == (width, height)
+    if copy_video:
+        try:
+            source_bitrate = int(video.get('bit_rate', 0))
+        except (TypeError, ValueError):
+            source_bitrate = 0
+        copy_video = 0 < source_bitrate <= bitrate * 1200  # -maxrate in bits/s
+    if copy_video:
+        # Copy skips -g/-keyint_min, so the source must already have 2-second keyframes
+        keyframe_interval = get_keyframe_interval(video_file)
+        # Rounded so a 60-frame GOP at 29.97 fps (2.002s) still counts as 2 seconds
+        copy_video = keyframe_interval is not None and round(keyframe_interval, 1) <= MAX_COPY_KEYFRAME_INTERVAL
+    
+    copy_audio = copy_video and audio is not None and audio.get('codec_name') == 'aac'
+    return copy_video, copy_audio
+
+RESOLUTIONS = ["Original", "1920x1080", "1280x720", "854x480", "640x360"]
+
+def _scale_pad_filter(resolution):
+    """Scale to fit the target size, padding with black to preserve the aspect ratio"""
+    width, height = resolution.split('x')
+    return f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,format=yuv420p'
+
+# Video filters built once at import. Shorts mode uses the same scale+pad: the 9:16 shape
+# comes from the chosen target size, so there is no separate Shorts filter.
+RESOLUTION_FILTERS = {
+    "Original": 'format=yuv420p',  # Keep original resolution but optimize for streaming
+    **{resolution: _scale_pad_filter(resolution) for resolution in RESOLUTIONS[1:]}
+}
+
+# Output options shared by every stream
+FFMPEG_OUTPUT_ARGS = (
+    '-f', 'flv',  # Output format
+    
+    # Advanced buffering and streaming optimizations
+    '-fflags', '+genpts+igndts',  # Generate PTS and ignore DTS
+    '-avoid_negative_ts', 'make_zero',  # Handle negative timestamps
+    '-max_muxing_queue_size', '1024',  # Increase muxing queue size
+    '-muxdelay', '0',  # No mux delay
+    '-muxpreload', '0',  # No mux preload
+    
+    # TCP and network optimizations
+    '-rtmp_live', 'live',  # RTMP live mode
+    '-rtmp_buffer', '100',  # RTMP buffer size (ms)
+    '-rtmp_flush_interval', '10',  # RTMP flush interval (ms)
+    
+    # Threading optimizations
+    '-threads', '0',  # Use all available CPU cores
+    '-thread_type', 'slice',  # Threading type
+)
+
+# Encoder-specific tuning for the hardware encoders (libx264 uses the selected preset instead)
+HARDWARE_ENCODER_ARGS = {
+    'h264_nvenc': ('-preset', 'p4', '-tune', 'll', '-rc', 'cbr', '-profile:v', 'high', '-level', '4.1', '-pix_fmt', 'yuv420p'),
+    'h264_qsv': ('-preset', 'veryfast', '-profile:v', 'high', '-pix_fmt', 'nv12'),
+    'h264_videotoolbox': ('-realtime', '1', '-profile:v', 'high', '-pix_fmt', 'yuv420p'),
+}
+
+def build_optimized_ffmpeg_command(video_file, stream_key, resolution, bitrate, audio_bitrate, encoding_preset, shorts_mode, verbose=False, video_encoder='libx264'):
     """Build optimized FFmpeg command with anti-buffering parameters"""
+    copy_video, copy_audio = get_stream_copy_plan(video_file, get_video_info(video_file), resolution, bitrate)
     
     # Base command with optimized buffering settings
     cmd = [
-        'ffmpeg',
+        get_ffmpeg_path() or 'ffmpeg',
         '-y',  # Overwrite output files
+        '-hide_banner',  # Skip the build banner
+        '-loglevel', 'info' if verbose else 'warning',  # Only warnings/errors unless debugging
+        '-stats',  # Progress lines are still printed at the quieter log level
         '-re',  # Read input at native frame rate (essential for live streaming)
         '-stream_loop', '-1',  # Loop the video indefinitely
         '-i', video_file,  # Input file
-        '-c:v', 'libx264',  # Video codec
-        '-preset', encoding_preset,  # Encoding preset
-        '-tune', 'zerolatency',  # Optimize for low latency
-        '-profile:v', 'high',  # H.264 profile
-        '-level', '4.1',  # H.264 level
-        '-pix_fmt', 'yuv420p',  # Pixel format
-        '-g', '60',  # GOP size (2 seconds at 30fps)
-        '-keyint_min', '30',  # Minimum keyframe interval
-        '-sc_threshold', '0',  # Disable scene change detection
-        '-b:v', f'{bitrate}k',  # Video bitrate
-        '-maxrate', f'{int(bitrate * 1.2)}k',  # Maximum bitrate (20% buffer)
-        '-bufsize', f'{int(bitrate * 2)}k',  # Buffer size (2x bitrate)
-        '-c:a', 'aac',  # Audio codec
-        '-b:a', f'{audio_bitrate}k',  # Audio bitrate
-        '-ar', '44100',  # Audio sample rate
-        '-ac', '2',  # Audio channels (stereo)
-        '-f', 'flv',  # Output format
-        
-        # Advanced buffering and streaming optimizations
-        '-fflags', '+genpts+igndts',  # Generate PTS and ignore DTS
-        '-avoid_negative_ts', 'make_zero',  # Handle negative timestamps
-        '-max_muxing_queue_size', '1024',  # Increase muxing queue size
-        '-muxdelay', '0',  # No mux delay
-        '-muxpreload', '0',  # No mux preload
-        
-        # TCP and network optimizations
-        '-rtmp_live', 'live',  # RTMP live mode
-        '-rtmp_buffer', '100',  # RTMP buffer size (ms)
-        '-rtmp_flush_interval', '10',  # RTMP flush interval (ms)
-        
-        # Threading optimizations
-        '-threads', '0',  # Use all available CPU cores
-        '-thread_type', 'slice',  # Threading type
     ]
     
-    # Resolution settings with aspect ratio optimization
-    if resolution == "Original":
-        # Keep original resolution but optimize for streaming
-        cmd.extend(['-vf', 'format=yuv420p'])
+    if copy_video:
+        # Source already matches the target encoding, pass it through untouched
+        cmd.extend(['-c:v', 'copy'])
     else:
-        width, height = resolution.split('x')
-        if shorts_mode:
-            # For YouTube Shorts (9:16 aspect ratio)
-            cmd.extend(['-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,format=yuv420p'])
+        cmd.extend(['-c:v', video_encoder])  # Video codec
+        if video_encoder in HARDWARE_ENCODER_ARGS:
+            cmd.extend(HARDWARE_ENCODER_ARGS[video_encoder])  # Encoding moves off the CPU
         else:
-            # Standard aspect ratio with padding if needed
-            cmd.extend(['-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,format=yuv420p'])
+            cmd.extend([
+                '-preset', encoding_preset,  # Encoding preset
+                '-tune', 'zerolatency',  # Optimize for low latency (implies sliced threads)
+                '-profile:v', 'high',  # H.264 profile
+                '-level', '4.1',  # H.264 level
+                '-pix_fmt', 'yuv420p',  # Pixel format
+            ])
+        cmd.extend([
+            '-g', '60',  # GOP size (2 seconds at 30fps)
+            '-keyint_min', '30',  # Minimum keyframe interval
+            '-sc_threshold', '0',  # Disable scene change detection
+            '-b:v', f'{bitrate}k',  # Video bitrate
+            '-maxrate', f'{int(bitrate * 1.2)}k',  # Maximum bitrate (20% buffer)
+            '-bufsize', f'{int(bitrate * 2)}k',  # Buffer size (2x bitrate)
+        ])
+    
+    if copy_audio:
+        cmd.extend(['-c:a', 'copy'])
+    else:
+        cmd.extend([
+            '-c:a', 'aac',  # Audio codec
+            '-b:a', f'{audio_bitrate}k',  # Audio bitrate
+            '-ar', '44100',  # Audio sample rate
+            '-ac', '2',  # Audio channels (stereo)
+        ])
+    
+    cmd.extend(FFMPEG_OUTPUT_ARGS)
+    
+    # Resolution settings with aspect ratio optimization (filters require re-encoding)
+    if not copy_video:
+        video_filter = RESOLUTION_FILTERS.get(resolution) or _scale_pad_filter(resolution)
+        cmd.extend(['-vf', video_filter])
     
     # Add RTMP URL
     rtmp_url = f"rtmp://a.rtmp.youtube.com/live2/{stream_key}"
@@ -296,66 +578,100 @@ def build_optimized_ffmpeg_command(video_file, stream_key, resolution, bitrate,
     
     return cmd
 
-def monitor_ffmpeg_output(process, session_id):
-    """Monitor FFmpeg output and extract statistics"""
-    stats_pattern = re.compile(
-        r'frame=\s*(\d+)\s+fps=\s*([\d.]+)\s+q=[\d.-]+\s+size=\s*(\d+)kB\s+time=(\d{2}:\d{2}:\d{2}\.\d{2})\s+bitrate=\s*([\d.]+)kbits/s\s+speed=\s*([\d.]+)x'
-    )
-    
-    buffer = ""
+# FFmpeg progress lines are redrawn with '\r', so split on both line terminators
+FFMPEG_LINE_SPLIT_RE = re.compile(rb'[\r\n]')
+# Once frames are duplicated or dropped FFmpeg inserts dup=/drop= fields before speed=
+FFMPEG_STATS_RE = re.compile(
+    rb'frame=\s*(\d+)\s+fps=\s*([\d.]+)\s+q=[\d.-]+\s+size=\s*(\d+)(?:kB|KiB)\s+time=((\d{2}):(\d{2}):(\d{2}\.\d{2}))\s+bitrate=\s*([\d.]+)kbits/s(?:\s+\w+=\s*\S+)*?\s+speed=\s*([\d.]+)x'
+)
+STATS_UPDATE_INTERVAL = 1.0  # Seconds between live stats updates
+
+def decode_log_batch(pending_logs):
+    """Decode buffered raw FFmpeg lines (bytes) into log messages only when flushing"""
+    return [
+        (level, message if isinstance(message, str) else f"FFmpeg: {message.decode('utf-8', errors='ignore')}")
+        for level, message in pending_logs
+    ]
+
+def monitor_ffmpeg_output(process, session_id, session_logs, stream_stats, debug_logs=False):
+    """Monitor FFmpeg output and extract statistics
+
+    Runs in a background thread without a script run context, so it writes to the session's
+    log deque and stats dict handed over by start_streaming rather than to st.session_state.
+    """
+    buffer = b""
+    last_stats_update = 0.0
+    last_logged_block = 0
+    pending_logs = []
+    last_log_flush = time.monotonic()
     
     try:
-        while process.poll() is None:
-            output = process.stderr.read(1024)
-            if output:
+        for output in iter(lambda: process.stderr.read1(65536), b''):
+            lines = FFMPEG_LINE_SPLIT_RE.split(buffer + output)
+            buffer = lines.pop()  # Keep the incomplete trailing line
+            
+            for raw_line in lines:
                 try:
-                    text = output.decode('utf-8', errors='ignore')
-                    buffer += text
+                    line = raw_line.strip()
                     
-                    # Process complete lines
-                    while '\n' in buffer:
-                        line, buffer = buffer.split('\n', 1)
-                        
-                        # Log FFmpeg output
-                        if line.strip():
-                            if 'error' in line.lower() or 'failed' in line.lower():
-                                log_message('ERROR', f"FFmpeg: {line.strip()}", session_id)
-                            elif 'warning' in line.lower():
-                                log_message('WARNING', f"FFmpeg: {line.strip()}", session_id)
-                            else:
-                                log_message('DEBUG', f"FFmpeg: {line.strip()}", session_id)
+                    match = FFMPEG_STATS_RE.search(line)
+                    
+                    # Buffer raw FFmpeg output; decoded and flushed in batches below.
+                    # Progress lines only feed the stats, they are not stored as logs.
+                    if line and not match:
+                        lowered = line.lower()
+                        if b'error' in lowered or b'failed' in lowered:
+                            pending_logs.append(('ERROR', line))
+                        elif b'warning' in lowered:
+                            pending_logs.append(('WARNING', line))
+                        elif debug_logs:
+                            pending_logs.append(('DEBUG', line))
+                    
+                    # Extract statistics
+                    if match:
+                        frame, fps, size_kb, time_str, hours, minutes, seconds, bitrate, speed = match.groups()
                         
-                        # Extract statistics
-                        match = stats_pattern.search(line)
-                        if match:
-                            frame, fps, size_kb, time_str, bitrate, speed = match.groups()
+                        # Coalesce updates; the UI only refreshes every few seconds, so lines
+                        # between updates are matched but never converted or copied
+                        now = time.monotonic()
+                        if now - last_stats_update >= STATS_UPDATE_INTERVAL:
+                            last_stats_update = now
                             
-                            # Parse time
-                            time_parts = time_str.split(':')
-                            total_seconds = int(time_parts[0]) * 3600 + int(time_parts[1]) * 60 + float(time_parts[2])
+                            # Time fields come pre-split from the regex groups
+                            total_seconds = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
                             
-                            st.session_state.stream_stats = {
+                            stats = {
                                 'frame': int(frame),
                                 'fps': float(fps),
                                 'size_kb': int(size_kb),
-                                'time': time_str,
+                                'time': time_str.decode(),
                                 'total_seconds': total_seconds,
                                 'bitrate': float(bitrate),
                                 'speed': float(speed),
                                 'last_update': datetime.now()
                             }
+                            stream_stats.update(stats)  # Same keys every time, one C-level update
                             
-                            # Log statistics periodically
-                            if int(frame) % 300 == 0:  # Every 300 frames (~10 seconds at 30fps)
-                                log_message('INFO', f"Streaming stats - Frame: {frame}, FPS: {fps}, Bitrate: {bitrate}kbps, Speed: {speed}x", session_id)
+                            # Log statistics periodically; progress lines rarely land exactly on
+                            # a multiple of 300, so log whenever a 300-frame boundary was crossed
+                            stats_block = stats['frame'] // 300  # Every 300 frames (~10 seconds at 30fps)
+                            if stats_block > last_logged_block:
+                                last_logged_block = stats_block
+                                pending_logs.append(('INFO', f"Streaming stats - Frame: {stats['frame']}, FPS: {stats['fps']}, Bitrate: {stats['bitrate']}kbps, Speed: {stats['speed']}x"))
                 
                 except Exception as e:
-                    log_message('ERROR', f"Error processing FFmpeg output: {e}", session_id)
+                    pending_logs.append(('ERROR', f"Error processing FFmpeg output: {e}"))
             
-            time.sleep(0.1)
+            now = time.monotonic()
+            if len(pending_logs) >= LOG_BATCH_SIZE or now - last_log_flush >= LOG_BATCH_INTERVAL:
+                log_messages(decode_log_batch(pending_logs), session_id, session_logs)
+                pending_logs = []
+                last_log_flush = now
     
     except Exception as e:
-        log_message('ERROR', f"Error monitoring FFmpeg output: {e}", session_id)
+        pending_logs.append(('ERROR', f"Error monitoring FFmpeg output: {e}"))
+    finally:
+        log_messages(decode_log_batch(pending_logs), session_id, session_logs)
 
 def start_streaming(video_file, stream_key, resolution, bitrate, audio_bitrate, encoding_preset, shorts_mode):
     """Start streaming with optimized settings"""
@@ -375,10 +691,15 @@ def start_streaming(video_file, stream_key, resolution, bitrate, audio_bitrate,
         if not is_valid:
             raise Exception(f"Invalid stream key: {message}")
         
+        # Fingerprint the key once per session; history rows never store the key itself
+        stream_key_hash = hash_stream_key(stream_key)
+        
         # Build optimized FFmpeg command
         cmd = build_optimized_ffmpeg_command(
             video_file, stream_key, resolution, bitrate, 
-            audio_bitrate, encoding_preset, shorts_mode
+            audio_bitrate, encoding_preset, shorts_mode,
+            verbose=st.session_state.ffmpeg_debug_logs,
+            video_encoder=resolve_video_encoder(st.session_state.video_encoder)
         )
         
         # Log command (sanitized)
@@ -388,37 +709,50 @@ def start_streaming(video_file, stream_key, resolution, bitrate, audio_bitrate,
         # Start FFmpeg process with optimized settings
         process = subprocess.Popen(
             cmd,
-            stdout=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,  # Output goes to RTMP; an unread stdout pipe could only block FFmpeg
             stderr=subprocess.PIPE,
             stdin=subprocess.PIPE,
-            bufsize=0,  # Unbuffered
-            universal_newlines=False
+            bufsize=-1,  # Default buffering; the monitor reads whole chunks, not single bytes
+            start_new_session=True  # Own process group so stop signals reach only this FFmpeg
         )
         
+        # Give FFmpeg a 1 MiB stderr pipe so it never stalls on writes while the monitor flushes logs
+        if fcntl is not None and hasattr(fcntl, 'F_SETPIPE_SZ'):
+            try:
+                fcntl.fcntl(process.stderr.fileno(), fcntl.F_SETPIPE_SZ, 1 << 20)
+            except OSError:
+                pass  # Capped by /proc/sys/fs/pipe-max-size; the default 64 KiB still works
+        
         st.session_state.streaming_process = process
+        _live_ffmpeg_processes().add(process)
         st.session_state.streaming_active = True
+        st.session_state.stream_stats = {}
         
-        # Start monitoring thread
+        # Start monitoring thread; it gets the session's objects since it cannot read st.session_state
         monitor_thread = threading.Thread(
             target=monitor_ffmpeg_output,
-            args=(process, session_id),
+            args=(process, session_id, st.session_state.stream_logs, st.session_state.stream_stats,
+                  st.session_state.ffmpeg_debug_logs),
             daemon=True
         )
         monitor_thread.start()
         
-        # Save to history with proper error handling
+        # Save to history together with the start log entry in one transaction
+        log_rows = add_session_logs([('INFO', "Streaming started successfully")], session_id)
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
                 cursor.execute('''
-                    INSERT INTO stream_history (session_id, video_file, resolution, bitrate, start_time, status)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (session_id, video_file, resolution, bitrate, datetime.now().isoformat(), 'STREAMING'))
+                    INSERT INTO stream_history (session_id, video_file, resolution, bitrate, start_time, status, stream_key_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (session_id, video_file, resolution, bitrate, log_rows[0][3], 'STREAMING', stream_key_hash))
+                cursor.executemany(STREAM_LOG_INSERT_SQL, log_rows)
                 conn.commit()
+            clear_history_caches()
         except Exception as db_error:
             log_message('WARNING', f"Failed to save stream history: {db_error}", session_id)
         
-        log_message('INFO', "Streaming started successfully", session_id)
         return True, "Streaming started successfully"
         
     except Exception as e:
@@ -426,13 +760,53 @@ def start_streaming(video_file, stream_key, resolution, bitrate, audio_bitrate,
         log_message('ERROR', f"Failed to start streaming: {error_msg}", session_id)
         return False, error_msg
 
+@st.cache_resource
+def _live_ffmpeg_processes():
+    """FFmpeg processes started by any session, terminated when the server exits
+
+    They run in their own process group, so Ctrl-C on the server never reaches them and the
+    looping stream would otherwise keep broadcasting after the app is gone.
+    """
+    processes = set()
+    atexit.register(_terminate_live_processes, processes)
+    return processes
+
+def _terminate_live_processes(processes):
+    for process in list(processes):
+        terminate_process(process)
+
+def terminate_process(process, timeout=3):
+    """Terminate an FFmpeg process group, escalating to SIGKILL if it doesn't exit in time"""
+    _live_ffmpeg_processes().discard(process)
+    if process.poll() is not None:
+        return
+    
+    def send(sig):
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, sig)
+            elif sig == signal.SIGTERM:
+                process.terminate()
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass  # Already exited
+    
+    send(signal.SIGTERM)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        send(getattr(signal, 'SIGKILL', signal.SIGTERM))
+        process.wait()
+
 def stop_streaming():
     """Stop streaming"""
     try:
         session_id = st.session_state.get('current_session_id')
         
         if st.session_state.streaming_process:
-            log_message('INFO', "Stopping streaming...", session_id)
+            # Lifecycle log entries are written together with the final history update
+            lifecycle_logs = [('INFO', "Stopping streaming...")]
             
             # Gracefully terminate FFmpeg
             try:
@@ -443,35 +817,39 @@ def stop_streaming():
                 try:
                     st.session_state.streaming_process.wait(timeout=10)
                 except subprocess.TimeoutExpired:
-                    log_message('WARNING', "FFmpeg didn't terminate gracefully, forcing kill", session_id)
-                    st.session_state.streaming_process.kill()
-                    st.session_state.streaming_process.wait()
+                    lifecycle_logs.append(('WARNING', "FFmpeg didn't terminate gracefully, forcing kill"))
+                    terminate_process(st.session_state.streaming_process)
                 
             except:
                 # Force kill if graceful termination fails
-                st.session_state.streaming_process.kill()
-                st.session_state.streaming_process.wait()
+                terminate_process(st.session_state.streaming_process)
             
-            # Update history with proper error handling
+            lifecycle_logs.append(('INFO', "Streaming stopped successfully"))
+            
+            # Update history and flush the lifecycle logs in one transaction
             if session_id:
+                log_rows = add_session_logs(lifecycle_logs, session_id)
                 try:
                     with get_db_connection() as conn:
                         cursor = conn.cursor()
-                        end_time = datetime.now().isoformat()
+                        cursor.execute('BEGIN IMMEDIATE')
                         cursor.execute('''
                             UPDATE stream_history 
                             SET end_time = ?, status = ?
                             WHERE session_id = ? AND end_time IS NULL
-                        ''', (end_time, 'STOPPED', session_id))
+                        ''', (log_rows[0][3], 'STOPPED', session_id))
+                        cursor.executemany(STREAM_LOG_INSERT_SQL, log_rows)
                         conn.commit()
+                    clear_history_caches()
                 except Exception as db_error:
                     log_message('WARNING', f"Failed to update stream history: {db_error}", session_id)
+            else:
+                log_messages(lifecycle_logs, session_id)
             
             st.session_state.streaming_process = None
             st.session_state.streaming_active = False
             st.session_state.stream_stats = {}
             
-            log_message('INFO', "Streaming stopped successfully", session_id)
             return True, "Streaming stopped successfully"
         else:
             return False, "No active streaming process"
@@ -481,34 +859,48 @@ def stop_streaming():
         log_message('ERROR', f"Error stopping streaming: {error_msg}", session_id)
         return False, error_msg
 
-def get_video_files(directory="/mount/src/liveyt9"):
-    """Get list of video files"""
-    # Use the correct directory path
-    if not os.path.exists(directory):
-        directory = "/mount/src/liveyt8"  # Fallback to correct directory
-    
-    video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.flv', '.webm', '.m4v']
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.webm', '.m4v')
+
+@st.cache_data(ttl=10)
+def _scan_video_files(directory, mtime_hint):
+    """Scan a directory for video files; mtime_hint invalidates the cache when the directory changes"""
     video_files = []
+    # scandir filters on names and d_type without a stat; only matches get stat()-ed
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(VIDEO_EXTENSIONS):
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()  # One stat gives both size and mtime
+                    video_files.append({
+                        'name': entry.name,
+                        'path': entry.path,
+                        'size': stat.st_size,
+                        'size_mb': round(stat.st_size / (1024 * 1024), 2),
+                        'mtime': stat.st_mtime
+                    })
+                except OSError:
+                    continue
     
+    return sorted(video_files, key=lambda x: x['name'])
+
+def get_video_files(directory="/mount/src/liveyt9"):
+    """Get list of video files"""
+    # Use the correct directory path; one stat per candidate instead of exists() + stat()
     try:
-        if os.path.exists(directory):
-            for file in os.listdir(directory):
-                if any(file.lower().endswith(ext) for ext in video_extensions):
-                    file_path = os.path.join(directory, file)
-                    try:
-                        size = os.path.getsize(file_path)
-                        video_files.append({
-                            'name': file,
-                            'path': file_path,
-                            'size': size,
-                            'size_mb': round(size / (1024 * 1024), 2)
-                        })
-                    except:
-                        continue
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            directory = "/mount/src/liveyt8"  # Fallback to correct directory
+            mtime = os.stat(directory).st_mtime_ns
+        return _scan_video_files(directory, mtime)
+    except FileNotFoundError:
+        pass
     except Exception as e:
         log_message('ERROR', f"Error scanning video files: {e}")
     
-    return sorted(video_files, key=lambda x: x['name'])
+    return []
 
 def save_configuration(name, config):
     """Save streaming configuration"""
@@ -522,19 +914,163 @@ def save_configuration(name, config):
             ''', (name, config['stream_key'], config['video_file'], config['resolution'], 
                   config['bitrate'], config['audio_bitrate'], config['encoding_preset'], config['shorts_mode']))
             conn.commit()
+        _cached_load_configurations.clear()
         return True
     except Exception as e:
         log_message('ERROR', f"Failed to save configuration: {e}")
         return False
 
+@st.cache_data(max_entries=8)
+def _cached_load_configurations(db_path):
+    """Query saved configurations; cached per database path until a save or reset clears it"""
+    import pandas as pd  # Deferred: only the Settings page needs it, keep it off the cold start
+    with get_db_connection(readonly=True) as conn:
+        return pd.read_sql_query('SELECT * FROM stream_configs ORDER BY created_at DESC', conn)
+
+@st.cache_data(ttl=30, max_entries=8)
+def _cached_stream_history(db_path):
+    """Query stream history as a display-ready Arrow table; cached per database path and cleared on write"""
+    import pandas as pd
+    import pyarrow as pa
+    with get_db_connection(readonly=True) as conn:
+        # Only the columns the table uses, with dtypes given upfront to skip inference;
+        # start times are parsed column-wise as ISO 8601 instead of guessed per row
+        history_df = pd.read_sql_query('''
+            SELECT id, start_time, video_file, resolution, bitrate, duration, status
+            FROM stream_history 
+            ORDER BY start_time DESC
+            LIMIT ?
+        ''', conn, params=(RECENT_STREAMS_LIMIT,), parse_dates={'start_time': {'format': 'ISO8601'}}, dtype={
+            'id': 'int64',
+            'video_file': 'object',
+            'resolution': 'category',  # Few distinct values: int8 codes plus a small dictionary
+            'bitrate': 'Int64',
+            'duration': 'float64',
+            'status': 'category'
+        })
+    
+    # Display formatting runs once per cache fill rather than on every rerun
+    history_df['video_file'] = history_df['video_file'].fillna('').str.rpartition(os.sep)[2]
+    # Vectorized m:ss formatting instead of a per-row Python callback
+    duration = history_df['duration']
+    duration_minutes = (duration // 60).astype('Int64').astype(str)
+    duration_seconds = (duration % 60 // 1).astype('Int64').astype(str).str.zfill(2)
+    history_df['duration_formatted'] = (duration_minutes + ':' + duration_seconds).where(duration.notna(), "N/A")
+    
+    # Arrow is what st.dataframe sends to the browser, so reruns skip the pandas -> Arrow conversion
+    return pa.Table.from_pandas(
+        history_df[['id', 'start_time', 'video_file', 'resolution', 'bitrate', 'duration_formatted', 'status']],
+        preserve_index=False
+    )
+
+@st.cache_data(ttl=30, max_entries=8)
+def _cached_stream_summary(db_path):
+    """Aggregate stream history metrics in SQL; cached per database path and cleared on write"""
+    with get_db_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(duration), 0), COALESCE(AVG(bitrate), 0),
+                   COALESCE(SUM(status = 'STOPPED'), 0)
+            FROM stream_history
+        ''')
+        total_streams, total_duration, avg_bitrate, successful_streams = cursor.fetchone()
+    return {
+        'total_streams': total_streams,
+        'total_duration': total_duration,
+        'avg_bitrate': avg_bitrate,
+        'successful_streams': successful_streams
+    }
+
+def clear_history_caches():
+    """Invalidate cached stream history reads after a write"""
+    _cached_stream_history.clear()
+    _cached_stream_summary.clear()
+
+def clear_stream_history():
+    """Delete all stream history and logs in a single transaction; returns the history rows removed"""
+    with get_db_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        # Unqualified DELETEs take SQLite's truncate optimization (no triggers or foreign keys);
+        # since SQLite 3.6.5 it still reports the rows removed, so no separate COUNT(*) pass
+        removed = conn.execute('DELETE FROM stream_history').rowcount
+        conn.execute('DELETE FROM stream_logs')
+        conn.commit()
+    clear_history_caches()
+    return removed
+
+def delete_stream_history(ids, chunk_size=500):
+    """Delete history rows by id in one transaction, chunked to stay under SQLite's parameter limit"""
+    ids = list(ids)
+    with get_db_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            placeholders = ','.join('?' * len(chunk))
+            conn.execute(f'DELETE FROM stream_history WHERE id IN ({placeholders})', chunk)
+        conn.commit()
+    clear_history_caches()
+
+def reset_database():
+    """Drop and recreate every table in one transaction on the shared connection, then compact"""
+    with get_db_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('DROP TABLE IF EXISTS stream_configs')
+        conn.execute('DROP TABLE IF EXISTS stream_history')
+        conn.execute('DROP TABLE IF EXISTS app_settings')
+        conn.execute('DROP TABLE IF EXISTS stream_logs')
+        init_database()  # Recreates the schema and commits the transaction
+        conn.execute('VACUUM')
+    _cached_load_configurations.clear()
+    clear_history_caches()
+
+def iter_stream_history():
+    """Yield stream history rows as dicts without materializing the whole table"""
+    with get_db_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute('SELECT * FROM stream_history ORDER BY start_time')
+        for row in cursor:
+            yield dict(row)
+
+def export_stream_history_json():
+    """Serialize stream history into a compact JSON array, one row at a time"""
+    buffer = io.BytesIO()
+    buffer.write(b'[')
+    for index, row in enumerate(iter_stream_history()):
+        if index:
+            buffer.write(b',')
+        buffer.write(orjson.dumps(row))  # Compact UTF-8 bytes, no str round-trip
+    buffer.write(b']')
+    return buffer.getvalue()
+
+# SQLite declared column types -> Arrow type aliases; anything else is exported as a string
+SQLITE_ARROW_TYPES = {'INTEGER': 'int64', 'REAL': 'float64'}
+
+def export_stream_history_arrow(batch_size=1000):
+    """Serialize stream history as an LZ4-compressed Arrow IPC (Feather v2) file, one record batch per fetch"""
+    import pyarrow as pa  # Ships with Streamlit; deferred like pandas
+    sink = pa.BufferOutputStream()
+    with get_db_connection(readonly=True) as conn:
+        # Schema from the declared column types, so every batch agrees even when a batch is all NULL
+        schema = pa.schema([
+            (name, pa.type_for_alias(SQLITE_ARROW_TYPES.get(declared_type.upper(), 'string')))
+            for _, name, declared_type, *_ in conn.execute('PRAGMA table_info(stream_history)')
+        ])
+        cursor = conn.execute('SELECT * FROM stream_history ORDER BY start_time')
+        options = pa.ipc.IpcWriteOptions(compression='lz4')
+        with pa.ipc.new_file(sink, schema, options=options) as writer:
+            while rows := cursor.fetchmany(batch_size):
+                columns = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+                writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+    return sink.getvalue().to_pybytes()
+
 def load_configurations():
     """Load saved configurations"""
     try:
-        with get_db_connection() as conn:
-            df = pd.read_sql_query('SELECT * FROM stream_configs ORDER BY created_at DESC', conn)
-        return df
+        return _cached_load_configurations(DB_PATH)
     except Exception as e:
         log_message('ERROR', f"Failed to load configurations: {e}")
+        import pandas as pd
         return pd.DataFrame()
 
 def show_stream_control():
@@ -582,7 +1118,7 @@ def show_stream_control():
     with col1:
         resolution = st.selectbox(
             "📺 Resolution",
-            ["Original", "1920x1080", "1280x720", "854x480", "640x360"]
+            RESOLUTIONS
         )
         
         shorts_mode = st.checkbox(
@@ -656,7 +1192,7 @@ def show_stream_control():
             if st.button("🚨 Emergency Stop", type="secondary"):
                 try:
                     if st.session_state.streaming_process:
-                        st.session_state.streaming_process.kill()
+                        terminate_process(st.session_state.streaming_process)
                         st.session_state.streaming_process = None
                     st.session_state.streaming_active = False
                     st.session_state.stream_stats = {}
@@ -683,45 +1219,76 @@ def show_stream_control():
             else:
                 st.error("Failed to save configuration")
     
-    # Live statistics
-    if st.session_state.streaming_active and st.session_state.stream_stats:
-        st.markdown("---")
-        st.subheader("📊 Live Statistics")
-        
-        stats = st.session_state.stream_stats
-        
-        col1, col2, col3, col4, col5 = st.columns(5)
-        
-        with col1:
-            st.metric("🎬 Frames", f"{stats.get('frame', 0):,}")
-        
-        with col2:
-            st.metric("📈 FPS", f"{stats.get('fps', 0):.1f}")
-        
-        with col3:
-            st.metric("📡 Bitrate", f"{stats.get('bitrate', 0):.1f} kbps")
-        
-        with col4:
-            st.metric("⏱️ Time", stats.get('time', '00:00:00'))
-        
-        with col5:
-            speed = stats.get('speed', 0)
-            speed_color = "normal" if 0.95 <= speed <= 1.05 else "inverse"
-            st.metric("⚡ Speed", f"{speed:.2f}x", delta_color=speed_color)
-        
-        # Progress bar
-        if stats.get('total_seconds', 0) > 0:
-            # For looped video, show progress within current loop
-            video_info = get_video_info(selected_video['path'])
-            if video_info and 'format' in video_info:
-                duration = float(video_info['format'].get('duration', 0))
-                if duration > 0:
-                    current_pos = stats['total_seconds'] % duration
-                    progress = current_pos / duration
-                    st.progress(progress, text=f"Video Progress: {current_pos:.1f}s / {duration:.1f}s")
-
-def show_live_logs():
+    # Live statistics refresh in their own fragment instead of rerunning the whole script
+    if st.session_state.streaming_active:
+        refresh_interval = get_refresh_interval()
+        st.fragment(show_live_statistics, run_every=refresh_interval)(selected_video['path'], refresh_interval is not None)
+
+def get_refresh_interval():
+    """Auto-refresh interval for live fragments, or None when auto-refresh is off or FFmpeg has exited"""
+    if not st.session_state.get('auto_refresh', True):
+        return None
+    process = st.session_state.streaming_process
+    if process is None or process.poll() is not None:
+        return None  # Nothing left to refresh; don't keep a client-side timer running
+    return AUTO_REFRESH_SECONDS
+
+def stop_refresh_if_ffmpeg_exited(refreshing):
+    """In a timed fragment run, rerun the whole app once FFmpeg has exited.
+
+    run_every is only read when the fragment is registered during a full run, so the timer
+    would otherwise keep firing; the app rerun registers the fragments again without it.
+    """
+    if not refreshing:
+        return
+    process = st.session_state.streaming_process
+    if process is None or process.poll() is not None:
+        st.rerun()
+
+def show_live_statistics(video_path, refreshing=False):
+    """Show live streaming statistics"""
+    stop_refresh_if_ffmpeg_exited(refreshing)
+    if not st.session_state.streaming_active or not st.session_state.stream_stats:
+        return
+    
+    st.markdown("---")
+    st.subheader("📊 Live Statistics")
+    
+    stats = st.session_state.stream_stats
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        st.metric("🎬 Frames", f"{stats.get('frame', 0):,}")
+    
+    with col2:
+        st.metric("📈 FPS", f"{stats.get('fps', 0):.1f}")
+    
+    with col3:
+        st.metric("📡 Bitrate", f"{stats.get('bitrate', 0):.1f} kbps")
+    
+    with col4:
+        st.metric("⏱️ Time", stats.get('time', '00:00:00'))
+    
+    with col5:
+        speed = stats.get('speed', 0)
+        speed_color = "normal" if 0.95 <= speed <= 1.05 else "inverse"
+        st.metric("⚡ Speed", f"{speed:.2f}x", delta_color=speed_color)
+    
+    # Progress bar
+    if stats.get('total_seconds', 0) > 0:
+        # For looped video, show progress within current loop
+        video_info = get_video_info(video_path)
+        if video_info and 'format' in video_info:
+            duration = float(video_info['format'].get('duration', 0))
+            if duration > 0:
+                current_pos = stats['total_seconds'] % duration
+                progress = current_pos / duration
+                st.progress(progress, text=f"Video Progress: {current_pos:.1f}s / {duration:.1f}s")
+
+def show_live_logs(refreshing=False):
     """Show live logs with filtering"""
+    stop_refresh_if_ffmpeg_exited(refreshing)
     st.subheader("📋 Live Logs")
     
     # Log controls
@@ -739,7 +1306,7 @@ def show_live_logs():
     
     with col3:
         if st.button("🗑️ Clear Logs"):
-            st.session_state.stream_logs = []
+            st.session_state.stream_logs.clear()
             st.rerun()
     
     with col4:
@@ -747,30 +1314,31 @@ def show_live_logs():
             if st.session_state.stream_logs:
                 log_text = "\n".join([
                     f"[{log['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}] {log['level']}: {log['message']}"
-                    for log in st.session_state.stream_logs
+                    for log in tuple(st.session_state.stream_logs)
                 ])
                 st.download_button(
                     "Download Logs",
                     log_text,
-                    file_name=f"stream_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                    file_name=f"stream_logs_{time.strftime('%Y%m%d_%H%M%S')}.txt",
                     mime="text/plain"
                 )
     
     # Display logs
     if st.session_state.stream_logs:
-        # Filter logs
-        filtered_logs = st.session_state.stream_logs
+        # Snapshot the deque in one C-level copy (the FFmpeg monitor thread may append while we
+        # filter), then filter lazily from the newest entry so only the shown logs are kept
+        filtered_logs = reversed(tuple(st.session_state.stream_logs))
         if log_level_filter != "ALL":
-            filtered_logs = [log for log in filtered_logs if log['level'] == log_level_filter]
+            filtered_logs = (log for log in filtered_logs if log['level'] == log_level_filter)
         
-        # Show recent logs (last 100)
-        recent_logs = filtered_logs[-100:] if len(filtered_logs) > 100 else filtered_logs
+        # Show recent logs (last 100), oldest first
+        recent_logs = list(itertools.islice(filtered_logs, 100))[::-1]
         
         # Create log display
         log_container = st.container()
         with log_container:
             for log in recent_logs:
-                timestamp = log['timestamp'].strftime('%H:%M:%S')
+                timestamp = log['display_time']
                 level = log['level']
                 message = log['message']
                 
@@ -786,8 +1354,22 @@ def show_live_logs():
     else:
         st.info("No logs available. Start streaming to see logs.")
 
+def delete_video_file(video):
+    """Delete button callback; runs before the rerun, so the listing that follows is already fresh"""
+    try:
+        os.remove(video['path'])
+        _scan_video_files.clear()
+        # New table key: the old selected row index would now point at the next file
+        st.session_state.video_files_table_version = st.session_state.get('video_files_table_version', 0) + 1
+        st.toast(f"Deleted: {video['name']}")
+        log_message('INFO', f"File deleted: {video['name']}")
+    except Exception as e:
+        st.toast(f"❌ Failed to delete: {e}")
+        log_message('ERROR', f"File deletion failed: {video['name']} - {e}")
+
 def show_file_manager():
     """File Manager Interface"""
+    import pandas as pd
     st.header("📁 File Manager")
     
     # Use the correct current directory
@@ -812,23 +1394,33 @@ def show_file_manager():
         accept_multiple_files=True
     )
     
+    # Forget uploads that were removed from the uploader, so the set only tracks what it still holds
+    st.session_state.saved_upload_ids &= {uploaded_file.file_id for uploaded_file in uploaded_files or ()}
+    
     if uploaded_files:
         for uploaded_file in uploaded_files:
             file_path = os.path.join(current_dir, uploaded_file.name)
             try:
+                # The uploader keeps its files across reruns; write each upload only once
+                if uploaded_file.file_id in st.session_state.saved_upload_ids:
+                    continue
+                
                 # Check if file already exists
                 if os.path.exists(file_path):
                     st.warning(f"⚠️ File {uploaded_file.name} already exists. Overwriting...")
                 
-                with open(file_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
+                # Write to disk in bounded chunks. The upload is already an in-memory BytesIO, so
+                # slice a memoryview of it instead of read() copying every chunk into new bytes
+                with uploaded_file.getbuffer() as view, open(file_path, "wb") as f:
+                    if hasattr(os, 'posix_fadvise'):
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    for offset in range(0, len(view), UPLOAD_CHUNK_SIZE):
+                        f.write(view[offset:offset + UPLOAD_CHUNK_SIZE])
+                st.session_state.saved_upload_ids.add(uploaded_file.file_id)
+                _scan_video_files.clear()  # The listing below rescans, so no rerun is needed
                 st.success(f"✅ Uploaded: {uploaded_file.name}")
                 log_message('INFO', f"File uploaded: {uploaded_file.name}")
                 
-                # Refresh the page to show the new file
-                time.sleep(1)
-                st.rerun()
-                
             except Exception as e:
                 st.error(f"❌ Failed to upload {uploaded_file.name}: {e}")
                 log_message('ERROR', f"File upload failed: {uploaded_file.name} - {e}")
@@ -838,53 +1430,62 @@ def show_file_manager():
     video_files = get_video_files(current_dir)
     
     if video_files:
-        for video in video_files:
-            with st.expander(f"📹 {video['name']} ({video['size_mb']} MB)"):
-                col1, col2 = st.columns([2, 1])
+        # One table with row selection instead of an expander and widgets per file
+        files_df = pd.DataFrame(
+            [{'File': video['name'], 'Size (MB)': video['size_mb']} for video in video_files]
+        )
+        selection = st.dataframe(
+            files_df,
+            hide_index=True,
+            width="stretch",
+            on_select="rerun",
+            selection_mode="single-row",
+            key=f"video_files_table_{st.session_state.get('video_files_table_version', 0)}"
+        )
+        
+        selected_rows = selection.selection.rows
+        if selected_rows and selected_rows[0] < len(video_files):
+            video = video_files[selected_rows[0]]
+            st.markdown(f"#### 📹 {video['name']}")
+            col1, col2 = st.columns([2, 1])
+            
+            with col1:
+                st.write(f"**Path:** {video['path']}")
+                st.write(f"**Size:** {video['size_mb']} MB")
                 
-                with col1:
-                    st.write(f"**Path:** {video['path']}")
-                    st.write(f"**Size:** {video['size_mb']} MB")
-                    
-                    # Get video info
-                    video_info = get_video_info(video['path'])
-                    if video_info and 'streams' in video_info:
-                        for stream in video_info['streams']:
-                            if stream.get('codec_type') == 'video':
-                                width = stream.get('width', 'Unknown')
-                                height = stream.get('height', 'Unknown')
-                                fps = stream.get('r_frame_rate', 'Unknown')
-                                if fps != 'Unknown' and '/' in str(fps):
-                                    try:
-                                        num, den = map(int, fps.split('/'))
-                                        fps = round(num / den, 2) if den != 0 else 'Unknown'
-                                    except:
-                                        pass
-                                st.write(f"**Resolution:** {width}x{height}")
-                                st.write(f"**FPS:** {fps}")
-                                break
-                    
-                    if video_info and 'format' in video_info:
-                        duration = video_info['format'].get('duration', 'Unknown')
-                        if duration != 'Unknown':
-                            try:
-                                duration_sec = float(duration)
-                                minutes = int(duration_sec // 60)
-                                seconds = int(duration_sec % 60)
-                                st.write(f"**Duration:** {minutes}:{seconds:02d}")
-                            except:
-                                st.write(f"**Duration:** {duration}")
+                # Get video info
+                video_info = get_video_info(video['path'], video['mtime'])
+                if video_info and 'streams' in video_info:
+                    for stream in video_info['streams']:
+                        if stream.get('codec_type') == 'video':
+                            width = stream.get('width', 'Unknown')
+                            height = stream.get('height', 'Unknown')
+                            fps = stream.get('r_frame_rate', 'Unknown')
+                            if fps != 'Unknown' and '/' in str(fps):
+                                try:
+                                    num, den = map(int, fps.split('/'))
+                                    fps = round(num / den, 2) if den != 0 else 'Unknown'
+                                except:
+                                    pass
+                            st.write(f"**Resolution:** {width}x{height}")
+                            st.write(f"**FPS:** {fps}")
+                            break
                 
-                with col2:
-                    if st.button(f"🗑️ Delete", key=f"delete_{video['name']}"):
+                if video_info and 'format' in video_info:
+                    duration = video_info['format'].get('duration', 'Unknown')
+                    if duration != 'Unknown':
                         try:
-                            os.remove(video['path'])
-                            st.success(f"Deleted: {video['name']}")
-                            log_message('INFO', f"File deleted: {video['name']}")
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"Failed to delete: {e}")
-                            log_message('ERROR', f"File deletion failed: {video['name']} - {e}")
+                            duration_sec = float(duration)
+                            minutes = int(duration_sec // 60)
+                            seconds = int(duration_sec % 60)
+                            st.write(f"**Duration:** {minutes}:{seconds:02d}")
+                        except:
+                            st.write(f"**Duration:** {duration}")
+            
+            with col2:
+                st.button(f"🗑️ Delete", key=f"delete_{video['name']}", on_click=delete_video_file, args=(video,))
+        else:
+            st.caption("Select a file to see its details and actions.")
     else:
         st.info("No video files found. Upload some videos to get started!")
 
@@ -973,6 +1574,7 @@ def show_video_merger():
             success, message = merge_videos(selected_videos, output_path, clean_method, output_resolution)
             
             if success:
+                _scan_video_files.clear()
                 st.success(f"✅ Videos merged successfully: {output_name}")
                 log_message('INFO', f"Videos merged: {output_name}")
                 st.rerun()
@@ -1070,67 +1672,90 @@ def merge_videos(video_list, output_path, method, resolution):
     finally:
         # Clean up temporary files
         try:
-            if os.path.exists("/tmp/filelist.txt"):
-                os.remove("/tmp/filelist.txt")
-        except:
-            pass
+            os.unlink("/tmp/filelist.txt")
+        except OSError:
+            pass  # Never created (non-concat merge) or already gone
 
 def show_analytics():
     """Analytics Dashboard"""
     st.header("📈 Analytics Dashboard")
     
     try:
-        with get_db_connection() as conn:
-            # Stream history
-            history_df = pd.read_sql_query('''
-                SELECT * FROM stream_history 
-                ORDER BY start_time DESC
-            ''', conn)
+        # Summary metrics are aggregated in SQL
+        summary = _cached_stream_summary(DB_PATH)
+        total_streams = summary['total_streams']
         
-        if not history_df.empty:
+        if total_streams > 0:
             # Summary metrics
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                total_streams = len(history_df)
                 st.metric("📊 Total Streams", total_streams)
             
             with col2:
-                successful_streams = len(history_df[history_df['status'] == 'STOPPED'])
-                success_rate = (successful_streams / total_streams * 100) if total_streams > 0 else 0
+                success_rate = summary['successful_streams'] / total_streams * 100
                 st.metric("✅ Success Rate", f"{success_rate:.1f}%")
             
             with col3:
-                total_duration = history_df['duration'].fillna(0).sum()
+                total_duration = summary['total_duration']
                 hours = int(total_duration // 3600)
                 minutes = int((total_duration % 3600) // 60)
                 st.metric("⏱️ Total Duration", f"{hours}h {minutes}m")
             
             with col4:
-                avg_bitrate = history_df['bitrate'].mean()
-                st.metric("📡 Avg Bitrate", f"{avg_bitrate:.0f} kbps")
+                st.metric("📡 Avg Bitrate", f"{summary['avg_bitrate']:.0f} kbps")
             
             # Recent streams table
             st.subheader("📋 Recent Streams")
-            display_df = history_df.copy()
-            display_df['video_file'] = display_df['video_file'].apply(lambda x: os.path.basename(x) if pd.notna(x) else '')
-            display_df['duration_formatted'] = display_df['duration'].apply(
-                lambda x: f"{int(x//60)}:{int(x%60):02d}" if pd.notna(x) else "N/A"
-            )
+            history_table = _cached_stream_history(DB_PATH)
+            history_ids = history_table.column('id')
+            # Fingerprint of the shared cached table: a new stream from any session shifts every
+            # row position, and a changed key drops the selection made on the old positions
+            table_fingerprint = f"{history_ids[0].as_py() if len(history_ids) else 0}_{len(history_ids)}"
             
-            st.dataframe(
-                display_df[['start_time', 'video_file', 'resolution', 'bitrate', 'duration_formatted', 'status']],
+            selection = st.dataframe(
+                history_table,
+                hide_index=True,
+                column_order=['start_time', 'video_file', 'resolution', 'bitrate', 'duration_formatted', 'status'],
                 column_config={
-                    'start_time': 'Start Time',
+                    'start_time': st.column_config.DatetimeColumn('Start Time', format="YYYY-MM-DD HH:mm:ss"),
                     'video_file': 'Video File',
                     'resolution': 'Resolution',
                     'bitrate': 'Bitrate (kbps)',
                     'duration_formatted': 'Duration',
                     'status': 'Status'
                 },
-                use_container_width=True
+                width="stretch",
+                on_select="rerun",
+                selection_mode="multi-row",
+                # The key is the table's identity, so a new key after a delete drops the old selection
+                key=f"history_table_{st.session_state.get('history_table_version', 0)}_{table_fingerprint}"
             )
             
+            selected_rows = selection.selection.rows
+            if selected_rows:
+                # Ids of the rows the user saw selected on the previous run, resolved on that run's table
+                selected_ids = st.session_state.get('history_selected_ids') or []
+                with st.form("delete_history_form"):
+                    confirm_delete = st.checkbox(f"Confirm deleting {len(selected_rows)} selected records")
+                    if st.form_submit_button(f"🗑️ Delete {len(selected_rows)} Selected"):
+                        if not confirm_delete:
+                            st.warning("Tick the confirmation box first.")
+                        elif len(selected_ids) != len(selected_rows):
+                            st.warning("The history changed while selecting; please select the records again.")
+                        else:
+                            try:
+                                delete_stream_history(selected_ids)
+                                log_message('INFO', f"Deleted {len(selected_ids)} stream history records")
+                                st.session_state.history_table_version = st.session_state.get('history_table_version', 0) + 1
+                                st.session_state.history_selected_ids = []
+                                st.rerun()
+                            except Exception as e:
+                                st.error(f"Failed to delete history: {e}")
+                st.session_state.history_selected_ids = history_ids.take(selected_rows).to_pylist()
+            else:
+                st.session_state.history_selected_ids = []
+            
         else:
             st.info("No streaming history available yet. Start streaming to see analytics!")
         
@@ -1142,36 +1767,48 @@ def show_settings():
     """Settings Interface"""
     st.header("⚙️ Settings")
     
-    # System Information
+    # System Information; the FFmpeg/disk probes only run while the panel is switched on
     st.subheader("💻 System Information")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        ffmpeg_status = "✅ Available" if check_ffmpeg() else "❌ Not Found"
-        st.info(f"**FFmpeg Status:** {ffmpeg_status}")
+    if st.toggle("Show system information", key="show_system_info"):
+        col1, col2 = st.columns(2)
         
-        # Count configurations
-        configs_df = load_configurations()
-        st.info(f"**Saved Configurations:** {len(configs_df)}")
-    
-    with col2:
-        current_dir = "/mount/src/liveyt9"
-        # Use correct directory
-        current_dir = "/mount/src/liveyt8"
-        st.info(f"**Current Directory:** {current_dir}")
+        with col1:
+            ffmpeg_available, ffmpeg_version = get_ffmpeg_version()
+            ffmpeg_status = "✅ Available" if ffmpeg_available else "❌ Not Found"
+            st.info(f"**FFmpeg Status:** {ffmpeg_status}")
+            if ffmpeg_version:
+                st.caption(ffmpeg_version)
+                if st.session_state.video_encoder == "Auto":  # Only opted-in users pay for the GPU probe
+                    st.info(f"**Auto Video Encoder:** {resolve_video_encoder('Auto')}")
+            
+            # Count configurations
+            configs_df = load_configurations()
+            st.info(f"**Saved Configurations:** {len(configs_df)}")
         
-        # Count stream history
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM stream_history')
-                history_count = cursor.fetchone()[0]
-            st.info(f"**Stream History Records:** {history_count}")
-        except:
-            st.info("**Stream History Records:** 0")
-    
-    st.info(f"**Database:** streaming_app.db")
+        with col2:
+            current_dir = "/mount/src/liveyt9"
+            # Use correct directory
+            current_dir = "/mount/src/liveyt8"
+            st.info(f"**Current Directory:** {current_dir}")
+            
+            # Disk space (refresh clears the cache before it is read below)
+            if st.button("🔄 Refresh Disk Space"):
+                get_disk_space.clear()
+            try:
+                free_gb, total_gb = get_disk_space(current_dir)
+                st.info(f"**Free Space:** {free_gb:.2f} GB / {total_gb:.2f} GB")
+            except OSError:
+                st.info("**Free Space:** Unknown")
+            
+            # Count stream history (shares the cached analytics summary)
+            try:
+                history_count = _cached_stream_summary(DB_PATH)['total_streams']
+                st.info(f"**Stream History Records:** {history_count}")
+            except:
+                st.info("**Stream History Records:** 0")
+        
+        st.info(f"**Database:** {DB_PATH}")
     
     # Application Settings
     st.subheader("🔧 Application Settings")
@@ -1182,6 +1819,12 @@ def show_settings():
         help="Automatically refresh streaming statistics"
     )
     
+    st.session_state.ffmpeg_debug_logs = st.checkbox(
+        "Log verbose FFmpeg output",
+        value=st.session_state.ffmpeg_debug_logs,
+        help="Store FFmpeg's informational lines as DEBUG logs (applies to the next stream)"
+    )
+    
     # Default Settings
     st.subheader("📋 Default Settings")
     
@@ -1198,7 +1841,7 @@ def show_settings():
         
         default_resolution = st.selectbox(
             "Default Resolution",
-            ["Original", "1920x1080", "1280x720", "854x480", "640x360"],
+            RESOLUTIONS,
             index=0
         )
     
@@ -1214,61 +1857,120 @@ def show_settings():
             ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow"],
             index=2
         )
+        
+        st.session_state.video_encoder = st.selectbox(
+            "Video Encoder",
+            VIDEO_ENCODERS,
+            index=VIDEO_ENCODERS.index(st.session_state.video_encoder),
+            help="libx264 honours the Encoding Preset. Auto uses a working GPU encoder (NVENC, Quick Sync, "
+                 "VideoToolbox) and falls back to libx264; the first start after a restart probes the GPU"
+        )
     
     # Database Management
     st.subheader("🗄️ Database Management")
     
     col1, col2, col3 = st.columns(3)
     
+    # Destructive actions use forms: confirm + submit costs a single rerun
     with col1:
-        if st.button("🗑️ Clear Stream History"):
-            try:
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('DELETE FROM stream_history')
-                    cursor.execute('DELETE FROM stream_logs')
-                    conn.commit()
-                
-                # Clear session state logs too
-                st.session_state.stream_logs = []
-                
-                st.success("Stream history cleared!")
-                log_message('INFO', "Stream history cleared by user")
-            except Exception as e:
-                st.error(f"Failed to clear history: {e}")
+        with st.form("clear_history_form"):
+            confirm_clear = st.checkbox("Confirm clear history")
+            if st.form_submit_button("🗑️ Clear Stream History"):
+                if not confirm_clear:
+                    st.warning("Tick the confirmation box first.")
+                else:
+                    try:
+                        removed = clear_stream_history()
+                        
+                        # Clear session state logs too
+                        st.session_state.stream_logs.clear()
+                        
+                        st.success(f"Stream history cleared! ({removed} records removed)")
+                        log_message('INFO', "Stream history cleared by user")
+                    except Exception as e:
+                        st.error(f"Failed to clear history: {e}")
     
     with col2:
-        if st.button("🔄 Reset Database"):
-            try:
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('DROP TABLE IF EXISTS stream_configs')
-                    cursor.execute('DROP TABLE IF EXISTS stream_history')
-                    cursor.execute('DROP TABLE IF EXISTS app_settings')
-                    cursor.execute('DROP TABLE IF EXISTS stream_logs')
-                    conn.commit()
-                init_database()
-                
-                # Clear session state
-                st.session_state.stream_logs = []
-                st.session_state.current_session_id = str(uuid.uuid4())
-                
-                st.success("Database reset successfully!")
-                log_message('INFO', "Database reset by user")
-            except Exception as e:
-                st.error(f"Failed to reset database: {e}")
+        with st.form("reset_database_form"):
+            confirm_reset = st.checkbox("Confirm database reset")
+            if st.form_submit_button("🔄 Reset Database"):
+                if not confirm_reset:
+                    st.warning("Tick the confirmation box first.")
+                else:
+                    try:
+                        reset_database()
+                        
+                        # Clear session state
+                        st.session_state.stream_logs.clear()
+                        st.session_state.current_session_id = str(uuid.uuid4())
+                        
+                        st.success("Database reset successfully!")
+                        log_message('INFO', "Database reset by user")
+                    except Exception as e:
+                        st.error(f"Failed to reset database: {e}")
     
     with col3:
         # Export configurations
         configs_df = load_configurations()
         if not configs_df.empty:
-            csv_data = configs_df.to_csv(index=False)
+            # Serialize straight into a bytes buffer instead of building an intermediate str
+            csv_data = io.BytesIO()
+            configs_df.to_csv(csv_data, index=False, encoding='utf-8')
+            csv_data.seek(0)
             st.download_button(
                 "📥 Export Configs",
                 csv_data,
-                file_name=f"stream_configs_{datetime.now().strftime('%Y%m%d')}.csv",
+                file_name=f"stream_configs_{time.strftime('%Y%m%d')}.csv",
                 mime="text/csv"
             )
+        
+        # Export history; generated only when clicked, streamed from the cursor
+        st.download_button(
+            "📥 Export History (Arrow)",
+            export_stream_history_arrow,
+            file_name=f"stream_history_{time.strftime('%Y%m%d')}.arrow",
+            mime="application/vnd.apache.arrow.file"
+        )
+        st.download_button(
+            "📥 Export History (JSON)",
+            export_stream_history_json,
+            file_name=f"stream_history_{time.strftime('%Y%m%d')}.json",
+            mime="application/json"
+        )
+
+# Custom CSS for better styling, built once at import
+APP_CSS = """
+<style>
+.main-header {
+    text-align: center;
+    padding: 1rem 0;
+    background: linear-gradient(90deg, #ff6b6b, #4ecdc4);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    background-clip: text;
+    font-size: 2.5rem;
+    font-weight: bold;
+    margin-bottom: 2rem;
+}
+
+.status-online {
+    color: #28a745;
+    font-weight: bold;
+}
+
+.status-offline {
+    color: #dc3545;
+    font-weight: bold;
+}
+
+.metric-card {
+    background: #f8f9fa;
+    padding: 1rem;
+    border-radius: 0.5rem;
+    border-left: 4px solid #007bff;
+}
+</style>
+"""
 
 def main():
     """Main application"""
@@ -1279,39 +1981,8 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Custom CSS for better styling
-    st.markdown("""
-    <style>
-    .main-header {
-        text-align: center;
-        padding: 1rem 0;
-        background: linear-gradient(90deg, #ff6b6b, #4ecdc4);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        font-size: 2.5rem;
-        font-weight: bold;
-        margin-bottom: 2rem;
-    }
-    
-    .status-online {
-        color: #28a745;
-        font-weight: bold;
-    }
-    
-    .status-offline {
-        color: #dc3545;
-        font-weight: bold;
-    }
-    
-    .metric-card {
-        background: #f8f9fa;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #007bff;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Custom CSS must be re-emitted on every run or Streamlit drops it
+    st.markdown(APP_CSS, unsafe_allow_html=True)
     
     # Header
     st.markdown('<h1 class="main-header">🚀 Advanced YouTube Live Streamer Pro</h1>', unsafe_allow_html=True)
@@ -1326,11 +1997,8 @@ def main():
         else:
             st.markdown('<p class="status-offline">⚫ OFFLINE</p>', unsafe_allow_html=True)
         
-        # Auto-refresh toggle
-        auto_refresh = st.checkbox("🔄 Auto Refresh (5s)", value=True)
-        if auto_refresh and st.session_state.streaming_active:
-            time.sleep(5)
-            st.rerun()
+        # Auto-refresh toggle (drives the live fragments, not a full-script rerun)
+        st.checkbox(f"🔄 Auto Refresh ({AUTO_REFRESH_SECONDS}s)", value=True, key="auto_refresh")
         
         st.markdown("---")
         
@@ -1349,16 +2017,18 @@ def main():
         # Show live logs if streaming
         if st.session_state.streaming_active:
             st.markdown("---")
-            show_live_logs()
+            refresh_interval = get_refresh_interval()
+            st.fragment(show_live_logs, run_every=refresh_interval)(refresh_interval is not None)
             
     elif page == "📁 File Manager":
-        show_file_manager()
+        # Row selection, uploads and deletes all rerun only this fragment, not the full app
+        st.fragment(show_file_manager)()
         
     elif page == "🔗 Video Merger":
         show_video_merger()
         
     elif page == "📈 Analytics":
-        show_analytics()
+        st.fragment(show_analytics)()
         
     elif page == "⚙️ Settings":
         show_settings()